@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import importlib, sys
+from concurrent.futures import ThreadPoolExecutor
 
 pkgs = [
     "streamlit", "pandas", "plotly",
@@ -10,15 +11,33 @@ pkgs = [
     "httpx", "pydantic", "tiktoken"
 ]
 
-print("🧪  Compat-test – stack FinanceBot\n")
-fail = []
-for name in pkgs:
+def _import(name):
     try:
         m = importlib.import_module(name)
-        print(f"✅ {name:<20} {getattr(m,'__version__','?')}")
+        return name, getattr(m, "__version__", "?"), None
     except Exception as e:
-        fail.append((name, str(e)))
-        print(f"❌ {name:<20} {e}")
+        return name, None, str(e)
+
+print("🧪  Compat-test – stack FinanceBot\n")
+
+# Bases compartilhadas primeiro (em serial): importar pandas em paralelo com
+# quem depende dele (streamlit) dispara import circular parcial.
+for base in ("numpy", "pandas", "pydantic"):
+    _import(base)
+
+# Demais imports em paralelo: o CPython solta o GIL no init das extensões
+# nativas e no I/O de disco, então as threads se sobrepõem.
+# ex.map preserva a ordem da lista, mantendo a saída determinística.
+with ThreadPoolExecutor(max_workers=8) as ex:
+    results = list(ex.map(_import, pkgs))
+
+fail = []
+for name, version, err in results:
+    if err is None:
+        print(f"✅ {name:<20} {version}")
+    else:
+        fail.append((name, err))
+        print(f"❌ {name:<20} {err}")
 
 if fail:
     print("\n🚨 Incompatibilidades:")
@@ -26,4 +45,4 @@ if fail:
         print(f"   • {n}: {err}")
     sys.exit(1)
 
-print("\n🎉 Ambiente limpo – todos os pacotes carregaram!")
\ No newline at end of file
+print("\n🎉 Ambiente limpo – todos os pacotes carregaram!")
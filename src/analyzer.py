@@ -1,46 +1,98 @@
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import numpy as np
 from datetime import datetime
+from functools import cached_property
+
+# Acima deste número de pontos o gráfico de linha é reamostrado antes de ir
+# para o Plotly (payload JSON e render no browser crescem linearmente)
+MAX_PONTOS_LINHA = 2000
+
+def _lttb_indices(x, y, n_out):
+    """Índices do downsampling Largest-Triangle-Three-Buckets.
+
+    Mantém no máximo n_out pontos preservando a forma visual da série.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    edges = np.linspace(1, n - 1, n_out - 1, dtype=np.int64)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Ponto médio do bucket seguinte
+        nlo = edges[i + 1]
+        nhi = edges[i + 2] if i + 2 < n_out - 1 else n
+        avg_x = x[nlo:nhi].mean()
+        avg_y = y[nlo:nhi].mean()
+        # Maior triângulo formado com o ponto anterior e a média seguinte
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
 
 class DataAnalyzer:
     def __init__(self, df):
+        # Converte 'data' para datetime64 uma única vez; os .dt/.groupby a
+        # jusante assumem a coluna já tipada. assign evita mutar o frame
+        # compartilhado pelo cache do Streamlit
+        if 'data' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['data']):
+            df = df.assign(data=pd.to_datetime(df['data']))
         self.df = df
     
+    @cached_property
     def gastos_por_mes(self):
         """Análise de gastos por mês"""
         if 'data' in self.df.columns:
-            monthly = self.df.groupby(self.df['data'].dt.to_period('M'))['valor'].sum()
+            monthly = self.df.groupby(self.df['data'].dt.to_period('M'), observed=True)['valor'].sum()
             return monthly
         return pd.Series()
     
+    @cached_property
     def gastos_por_categoria(self):
         """Análise de gastos por categoria"""
-        categoria_gastos = self.df.groupby('categoria')['valor'].sum()
+        categoria_gastos = self.df.groupby('categoria', observed=True, sort=False)['valor'].sum()
         return categoria_gastos
     
+    @cached_property
     def gastos_por_forma_pagamento(self):
         """Análise de gastos por forma de pagamento"""
         if 'forma_pagamento' in self.df.columns:
-            pagamento_gastos = self.df.groupby('forma_pagamento')['valor'].sum()
+            pagamento_gastos = self.df.groupby('forma_pagamento', observed=True, sort=False)['valor'].sum()
             return pagamento_gastos
         return pd.Series()
     
     def criar_grafico_linha(self):
         """Gráfico de linha temporal dos gastos"""
+        import plotly.graph_objects as go
+
         # Agrupar por data
-        gastos_diarios = self.df.groupby('data')['valor'].sum().reset_index()
-        
-        fig = px.line(
-            gastos_diarios, 
-            x='data', 
-            y='valor',
-            title='Evolução dos Gastos no Tempo',
-            labels={'valor': 'Valor (R$)', 'data': 'Data'}
-        )
-        
+        gastos_diarios = self.df.groupby('data', observed=True)['valor'].sum().reset_index()
+
+        # Históricos longos são reamostrados com LTTB antes da serialização
+        if len(gastos_diarios) > MAX_PONTOS_LINHA:
+            idx = _lttb_indices(
+                gastos_diarios['data'].values.astype('int64'),
+                gastos_diarios['valor'].values,
+                MAX_PONTOS_LINHA
+            )
+            gastos_diarios = gastos_diarios.iloc[idx]
+
+        # Scattergl renderiza via WebGL — não bloqueia o browser com DOM SVG
+        fig = go.Figure(go.Scattergl(
+            x=gastos_diarios['data'],
+            y=gastos_diarios['valor'],
+            mode='lines'
+        ))
+
         # Customizar layout
         fig.update_layout(
+            title='Evolução dos Gastos no Tempo',
             xaxis_title="Data",
             yaxis_title="Valor (R$)",
             hovermode='x unified'
@@ -53,7 +105,9 @@ class DataAnalyzer:
     
     def criar_grafico_pizza(self):
         """Gráfico de pizza por categoria"""
-        categoria_gastos = self.gastos_por_categoria()
+        import plotly.express as px
+
+        categoria_gastos = self.gastos_por_categoria
         
         fig = px.pie(
             values=categoria_gastos.values,
@@ -72,7 +126,9 @@ class DataAnalyzer:
     
     def criar_grafico_barras_categoria(self):
         """Gráfico de barras horizontais por categoria"""
-        categoria_gastos = self.gastos_por_categoria().sort_values(ascending=True)
+        import plotly.express as px
+
+        categoria_gastos = self.gastos_por_categoria.sort_values(ascending=True)
         
         fig = px.bar(
             x=categoria_gastos.values,
@@ -95,12 +151,20 @@ class DataAnalyzer:
     
     def criar_grafico_mensal(self):
         """Gráfico de gastos mensais por categoria"""
+        # Import adiado: páginas sem gráfico não pagam o load do plotly
+        import plotly.express as px
+        import plotly.graph_objects as go
+
         if len(self.df) == 0:
             return go.Figure()
         
-        # Preparar dados mensais
-        self.df['mes_ano'] = self.df['data'].dt.to_period('M').astype(str)
-        gastos_mensais = self.df.groupby(['mes_ano', 'categoria'])['valor'].sum().reset_index()
+        # Chave mensal via datetime64[M] (int64 por baixo): evita construir um
+        # objeto Period/str por linha e não muta o DataFrame compartilhado
+        meses = self.df['data'].values.astype('datetime64[M]')
+        gastos_mensais = self.df.groupby([meses, 'categoria'], observed=True)['valor'].sum().reset_index()
+        gastos_mensais.columns = ['mes_ano', 'categoria', 'valor']
+        # Formatar apenas os meses únicos já agregados
+        gastos_mensais['mes_ano'] = pd.to_datetime(gastos_mensais['mes_ano']).dt.strftime('%Y-%m')
         
         fig = px.bar(
             gastos_mensais,
@@ -116,7 +180,9 @@ class DataAnalyzer:
             yaxis_title="Valor (R$)",
             legend_title="Categoria"
         )
-        
+        # Sem contorno nas barras: metade das draw calls no render
+        fig.update_traces(marker_line_width=0)
+
         return fig
     
     def get_top_gastos(self, n=5):
@@ -130,15 +196,18 @@ class DataAnalyzer:
         """Retorna estatísticas básicas dos gastos SEM conversões float()"""
         if len(self.df) == 0:
             return {}
-        
-        # Usar operações diretas do pandas sem conversões manuais
+
+        # Uma única passada sobre a coluna valor em vez de cinco reduções separadas
+        stats = self.df['valor'].agg(['sum', 'mean', 'median', 'max', 'min'])
+        categoria_gastos = self.gastos_por_categoria
+
         return {
-            'total_gastos': self.df['valor'].sum(),  # Já retorna float nativo
-            'media_gastos': self.df['valor'].mean(),  # Já retorna float nativo
-            'mediana_gastos': self.df['valor'].median(),  # Já retorna float nativo
-            'maior_gasto': self.df['valor'].max(),  # Já retorna float nativo
-            'menor_gasto': self.df['valor'].min(),  # Já retorna float nativo
-            'total_transacoes': len(self.df),  # Já retorna int
-            'categoria_mais_gasta': self.gastos_por_categoria().idxmax() if not self.gastos_por_categoria().empty else 'N/A'
+            'total_gastos': stats['sum'],
+            'media_gastos': stats['mean'],
+            'mediana_gastos': stats['median'],
+            'maior_gasto': stats['max'],
+            'menor_gasto': stats['min'],
+            'total_transacoes': len(self.df),
+            'categoria_mais_gasta': categoria_gastos.idxmax() if not categoria_gastos.empty else 'N/A'
         }
 
@@ -4,6 +4,17 @@ from datetime import datetime
 import traceback
 import os
 
+@st.cache_data(ttl=30)
+def _db_ok():
+    """Sondagem do banco cacheada por 30s — reruns consecutivos na tela de
+    erro não refazem o handshake"""
+    try:
+        from data_collector import DataCollector
+        DataCollector()
+        return True
+    except Exception:
+        return False
+
 def show_chat_interface():
     """Interface de chat com o FinanceBot - VERSÃO SEM LOOP"""
     st.title("💬 Chat com FinanceBot")
@@ -29,13 +40,12 @@ def show_chat_interface():
                 else:
                     st.write("❌ GROQ_API_KEY não encontrada")
                 
-                # Banco de dados
-                try:
-                    from data_collector import DataCollector
-                    collector = DataCollector()
-                    st.write("✅ Conexão com banco OK")
-                except:
-                    st.write("❌ Problema na conexão com banco")
+                # Banco de dados — sondagem só sob demanda
+                if st.button("🔌 Testar conexão com banco"):
+                    if _db_ok():
+                        st.write("✅ Conexão com banco OK")
+                    else:
+                        st.write("❌ Problema na conexão com banco")
                 
                 st.info("""
                 **💡 Soluções:**
@@ -69,102 +79,60 @@ Como posso ajudar você hoje? 😊"""
         st.session_state.chat_messages.append({
             "role": "assistant",
             "content": welcome_message,
-            "timestamp": datetime.now()
+            "hora": datetime.now().strftime('%H:%M')
         })
 
-    # Inicializar flag de processamento
-    if 'processing_message' not in st.session_state:
-        st.session_state.processing_message = False
-    
-    # Container do chat - exibir mensagens
-    chat_container = st.container()
-    
-    with chat_container:
-        for message in st.session_state.chat_messages:
-            timestamp = message.get('timestamp', datetime.now()).strftime('%H:%M')
-            
-            if message["role"] == "user":
-                st.markdown(f"""
-                <div style='display: flex; justify-content: flex-end; margin: 10px 0;'>
-                    <div style='background-color: #0066cc; color: white; padding: 10px; border-radius: 10px; max-width: 70%; word-wrap: break-word;'>
-                        <strong>Você ({timestamp}):</strong><br>
-                        {message["content"]}
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-            else:
-                st.markdown(f"""
-                <div style='display: flex; justify-content: flex-start; margin: 10px 0;'>
-                    <div style='background-color: #f0f0f0; color: black; padding: 10px; border-radius: 10px; max-width: 70%; word-wrap: break-word;'>
-                        <strong>🤖 FinanceBot ({timestamp}):</strong><br>
-                        {message["content"]}
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-    
-    # Separador
-    st.markdown("---")
-    
-    # Input do usuário - usar form para controlar melhor
-    with st.form(key="chat_form", clear_on_submit=True):
-        col1, col2, col3 = st.columns([6, 1, 1])
-        
-        with col1:
-            user_input = st.text_input(
-                "Digite sua mensagem:",
-                placeholder="Ex: Gastei 30 reais com almoço hoje...",
-                key="user_message_input"
-            )
-        
-        with col2:
-            send_button = st.form_submit_button("📤 Enviar")
-        
-        with col3:
-            clear_button = st.form_submit_button("🗑️ Limpar")
-    
-    # Processar mensagem - EVITAR LOOP
-    if send_button and user_input.strip() and not st.session_state.processing_message:
-        # Marcar como processando para evitar loops
-        st.session_state.processing_message = True
-        
-        # Adicionar mensagem do usuário
+    # Container do chat - st.chat_message é diff-aware: o front só
+    # re-renderiza as mensagens novas, sem reconstruir o DOM inteiro
+    # Hora já vem formatada da criação da mensagem: nenhum strftime (nem
+    # datetime.now de fallback) por mensagem a cada rerun
+    for message in st.session_state.chat_messages:
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+            if 'hora' in message:
+                st.caption(message['hora'])
+
+    # Limpar histórico
+    if st.sidebar.button("🗑️ Limpar conversa"):
+        st.session_state.chat_messages = []
+        if 'finance_bot' in st.session_state:
+            st.session_state.finance_bot.clear_history()
+        st.rerun()
+
+    # Entrada nativa de chat: dedup de submit embutido, dispensa o form e a
+    # flag processing_message
+    if prompt := st.chat_input("Ex: Gastei 30 reais com almoço hoje..."):
         st.session_state.chat_messages.append({
             "role": "user",
-            "content": user_input.strip(),
-            "timestamp": datetime.now()
+            "content": prompt,
+            "hora": datetime.now().strftime('%H:%M')
         })
-        
-        # Obter resposta do bot
-        with st.spinner("🤖 Pensando..."):
+
+        with st.chat_message("user"):
+            st.markdown(prompt)
+
+        # Streaming: o primeiro token aparece em ~100ms em vez de esperar a
+        # resposta completa do modelo
+        with st.chat_message("assistant"):
             try:
-                response = st.session_state.finance_bot.chat(user_input.strip())
-                st.session_state.chat_messages.append({
-                    "role": "assistant", 
-                    "content": response,
-                    "timestamp": datetime.now()
-                })
+                resultado = st.session_state.finance_bot.chat_stream(prompt)
+                if isinstance(resultado, str):
+                    st.markdown(resultado)
+                    response = resultado
+                else:
+                    response = st.write_stream(resultado)
+                st.session_state.finance_bot.record_exchange(prompt, response)
             except Exception as e:
-                error_response = f"❌ Erro ao processar: {str(e)}"
-                st.session_state.chat_messages.append({
-                    "role": "assistant",
-                    "content": error_response,
-                    "timestamp": datetime.now()
-                })
-        
-        # Resetar flag de processamento
-        st.session_state.processing_message = False
-        
-        # Recarregar a página APENAS UMA VEZ
-        st.rerun()
-    
-    # Limpar histórico
-    if clear_button:
-        st.session_state.chat_messages = []
-        if 'finance_bot' in st.session_state:
-            st.session_state.finance_bot.clear_history()
-        st.session_state.processing_message = False
+                response = f"❌ Erro ao processar: {str(e)}"
+                st.markdown(response)
+
+        st.session_state.chat_messages.append({
+            "role": "assistant",
+            "content": response,
+            "hora": datetime.now().strftime('%H:%M')
+        })
         st.rerun()
-    
+
     # Estatísticas na sidebar
     if len(st.session_state.chat_messages) > 1:
         st.sidebar.markdown("### 💬 Estatísticas do Chat")
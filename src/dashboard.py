@@ -1,11 +1,12 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 from data_collector import DataCollector
-from analyzer import DataAnalyzer
+from analyzer import DataAnalyzer, _lttb_indices
 from datetime import datetime, date
-import plotly.express as px
-import plotly.graph_objects as go
 import traceback
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 # Configuração da página
 st.set_page_config(
@@ -43,18 +44,270 @@ else:
 
 page = st.sidebar.selectbox("Escolha uma página:", opcoes)
 
-# Cache para dados
-@st.cache_data
+# Janelas de período do histórico em dias (rótulo -> dias)
+PERIODOS_HISTORICO = {"Últimos 30 dias": 30, "Últimos 90 dias": 90}
+
+# Períodos do dashboard: Timedelta fixo ou âncora derivada de "agora".
+# Pré-construído no módulo — o caminho quente faz um lookup, sem if/elif
+# nem alocação de Timedelta por rerun
+PERIODO_PARA_LIMITE = {
+    "Últimos 7 dias": pd.Timedelta(days=7),
+    "Últimos 30 dias": pd.Timedelta(days=30),
+    "Últimos 3 meses": pd.Timedelta(days=90),
+    "Este mês": lambda hoje: pd.Timestamp(hoje.year, hoje.month, 1),
+    "Este ano": lambda hoje: pd.Timestamp(hoje.year, 1, 1),
+}
+
+# Cache para dados — contêiner mutável compartilhado por referência entre
+# sessões: o cadastro anexa a linha nova ao frame em vez de recarregar a
+# tabela inteira do banco
+@st.cache_resource
+def _data_store():
+    return {'df': None, 'carregado_em': 0.0}
+
 def load_data():
-    """Carrega dados do banco ou fallback"""
-    try:
-        df = data_collector.load_from_database()
-        if not df.empty:
+    """Carrega dados do banco ou fallback (recarga a cada 5 min)"""
+    store = _data_store()
+    if store['df'] is None or time.time() - store['carregado_em'] > 300:
+        try:
+            df = data_collector.load_from_database()
+            if df.empty:
+                return None
             st.sidebar.success(f"✅ {len(df)} gastos carregados")
-            return df
-    except Exception as e:
-        st.sidebar.warning("⚠️ Usando dados de exemplo")
-        return data_collector.collect_sample_data()
+            store['df'] = _preparar_df(df)
+        except Exception as e:
+            st.sidebar.warning("⚠️ Usando dados de exemplo")
+            store['df'] = _preparar_df(data_collector.collect_sample_data())
+        store['carregado_em'] = time.time()
+    return store['df']
+
+def _preparar_df(df):
+    """Normaliza o frame carregado: ordenado por data (habilita busca
+    binária nos filtros de período) e com colunas categóricas"""
+    df = df.sort_values('data').reset_index(drop=True)
+    return _as_categorical(df)
+
+def _as_categorical(df):
+    """Converte colunas de baixa cardinalidade para dtype category"""
+    for col in ('categoria', 'forma_pagamento'):
+        if col in df.columns and df[col].dtype == object:
+            df[col] = df[col].astype('category')
+    return df
+
+
+def _opcoes(df, col):
+    """Opções de filtro sem varrer a coluna inteira: com dtype category as
+    categorias já estão armazenadas (e ordenadas) — O(#categorias)"""
+    serie = df[col]
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.categories.tolist()
+    return sorted(serie.unique())
+
+
+# Fingerprint barato para frames cacheados: tamanho + datas das pontas +
+# soma de valor identificam a fatia sem o hash O(bytes) do conteúdo inteiro.
+# (id() não serve de chave: st.cache_data devolve um objeto novo por hit.)
+def _df_fingerprint(d):
+    if len(d) == 0:
+        return (0,)
+    return (len(d), str(d['data'].iat[0]), str(d['data'].iat[-1]), float(d['valor'].sum()))
+
+_DF_HASH = {pd.DataFrame: _df_fingerprint}
+
+@st.cache_data(ttl=3600)
+def period_cutoffs():
+    """Cortes de período resolvidos uma vez por hora (normalizados para a
+    meia-noite), em vez de Timestamp.now() + aritmética por chamada"""
+    hoje = pd.Timestamp.now().normalize()
+    return {
+        rotulo: (limite(hoje) if callable(limite) else hoje - limite)
+        for rotulo, limite in PERIODO_PARA_LIMITE.items()
+    }
+
+@st.cache_data(ttl=300, hash_funcs=_DF_HASH)
+def filter_expenses(df, categorias, periodo):
+    """Aplica filtro de categoria + período no dashboard.
+
+    Cacheado pela tupla de categorias e pelo rótulo do período: reruns com a
+    mesma seleção devolvem a fatia memorizada sem refazer as máscaras.
+    O ttl acompanha o corte móvel dos períodos relativos.
+    """
+    df_filtrado = df[df['categoria'].isin(categorias)]
+
+    data_limite = period_cutoffs().get(periodo)
+    if data_limite is not None:
+        # O frame chega ordenado por data do load_data: achar o corte é
+        # O(log N) + fatia, em vez de máscara booleana sobre a coluna toda
+        idx = df_filtrado['data'].values.searchsorted(data_limite.to_datetime64())
+        df_filtrado = df_filtrado.iloc[idx:]
+
+    return df_filtrado
+
+
+# Templates estáticos dos cards de métrica: o HTML/CSS é constante, só os
+# valores são interpolados a cada rerun
+_CARD_TPL = (
+    '<div style="background: linear-gradient(135deg, {cores}); '
+    'padding: 1.5rem; border-radius: 15px; text-align: center; color: white; margin-bottom: 1rem;">'
+    '<h3 style="margin: 0; font-size: 1.1rem; opacity: 0.9;">{titulo}</h3>'
+    '<h2 style="margin: 0.5rem 0 0 0; font-size: {tamanho}; font-weight: bold;">{valor}</h2>'
+    '{rodape}</div>'
+)
+_CARD_RODAPE_TPL = '<p style="margin: 0.2rem 0 0 0; font-size: 0.9rem; opacity: 0.8;">{texto}</p>'
+
+# === ANÁLISES CACHEADAS ===
+# Saídas do DataAnalyzer memoizadas pela fatia filtrada: com filtros
+# idênticos, reruns não refazem nenhuma passada pandas
+@st.cache_data(ttl=300, hash_funcs=_DF_HASH)
+def compute_stats(df):
+    return DataAnalyzer(df).get_estatisticas_basicas()
+
+@st.cache_data(ttl=300, hash_funcs=_DF_HASH)
+def compute_categoria_gastos(df):
+    return DataAnalyzer(df).gastos_por_categoria
+
+@st.cache_data(ttl=300, hash_funcs=_DF_HASH)
+def compute_top_gastos(df, n=5):
+    return DataAnalyzer(df).get_top_gastos(n)
+
+
+@st.cache_data(ttl=300, hash_funcs=_DF_HASH)
+def category_rollup(df):
+    """Resumo por categoria (sum/size/mean) memoizado por fatia filtrada"""
+    return (
+        df.groupby('categoria', observed=True)['valor']
+        .agg(['sum', 'size', 'mean'])
+        .nlargest(5, 'sum')
+    )
+
+
+# === FIGURAS CACHEADAS ===
+# Os builders devolvem o dict da figura já pronto; com o mesmo dado filtrado,
+# reruns seguintes pulam a construção/validação Python do Plotly. Com orjson
+# instalado o Plotly também serializa o JSON pela engine nativa.
+@st.cache_data(hash_funcs=_DF_HASH)
+def build_line_fig(gastos_diarios):
+    """Figura de linha da evolução diária (dict cacheado)"""
+    import plotly.graph_objects as go
+
+    # Séries longas: LTTB limita o payload a ~800 pontos preservando a forma
+    if len(gastos_diarios) > 1500:
+        idx = _lttb_indices(
+            gastos_diarios['data'].values.astype('int64'),
+            gastos_diarios['valor'].values,
+            800
+        )
+        gastos_diarios = gastos_diarios.iloc[idx]
+
+    # Scattergl: render WebGL na GPU em vez de um nó SVG por ponto
+    fig_linha = go.Figure(go.Scattergl(
+        x=gastos_diarios['data'],
+        y=gastos_diarios['valor'],
+        mode='lines',
+        line=dict(width=3, color='#667eea'),
+        hovertemplate='<b>%{x}</b><br>R$ %{y:,.2f}<extra></extra>'
+    ))
+
+    fig_linha.update_layout(
+        height=400,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#333'),
+        xaxis=dict(title='Data', showgrid=True, gridwidth=1, gridcolor='rgba(0,0,0,0.1)'),
+        yaxis=dict(title='Valor (R$)', showgrid=True, gridwidth=1, gridcolor='rgba(0,0,0,0.1)')
+    )
+
+    return fig_linha.to_dict()
+
+@st.cache_data
+def build_pizza_fig(categoria_gastos):
+    """Figura de pizza por categoria (dict cacheado)"""
+    import plotly.express as px
+
+    colors = ['#667eea', '#764ba2', '#f093fb', '#f5576c', '#4facfe', '#00f2fe', '#fa709a', '#fee140']
+
+    fig_pizza = px.pie(
+        values=categoria_gastos.values,
+        names=categoria_gastos.index,
+        title='',
+        color_discrete_sequence=colors
+    )
+
+    fig_pizza.update_layout(
+        height=400,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#333'),
+        showlegend=True,
+        legend=dict(
+            orientation="v",
+            yanchor="middle",
+            y=0.5,
+            xanchor="left",
+            x=1.05
+        )
+    )
+
+    fig_pizza.update_traces(
+        textposition='inside',
+        textinfo='percent',
+        hovertemplate='<b>%{label}</b><br>R$ %{value:,.2f}<br>%{percent}<extra></extra>'
+    )
+
+    return fig_pizza.to_dict()
+
+
+def _gastos_diarios(df_filtrado):
+    """Totais diários via reduceat: o frame já vem ordenado por data, então
+    os segmentos são contíguos e a soma sai numa passada C, sem a tabela
+    hash do groupby"""
+    dates = df_filtrado['data'].values
+    vals = df_filtrado['valor'].values
+    if len(dates) == 0:
+        return pd.DataFrame({'data': dates, 'valor': vals})
+    change = np.empty(len(dates), dtype=bool)
+    change[0] = True
+    np.not_equal(dates[1:], dates[:-1], out=change[1:])
+    starts = np.flatnonzero(change)
+    return pd.DataFrame({'data': dates[starts], 'valor': np.add.reduceat(vals, starts)})
+
+
+@st.fragment
+def render_dashboard_charts(df_filtrado, categoria_gastos):
+    """Bloco de gráficos isolado em fragment: interações dentro dele não
+    disparam um rerun do script inteiro"""
+    col1, col2 = st.columns([2, 1])
+
+    with col1:
+        st.markdown("### 📈 Evolução dos Gastos no Tempo")
+        try:
+            st.plotly_chart(build_line_fig(_gastos_diarios(df_filtrado)), use_container_width=True)
+        except Exception as e:
+            st.error(f"Erro ao criar gráfico de linha: {e}")
+
+    with col2:
+        st.markdown("### 🥧 Distribuição por Categoria")
+        try:
+            st.plotly_chart(build_pizza_fig(categoria_gastos), use_container_width=True)
+        except Exception as e:
+            st.error(f"Erro ao criar gráfico de pizza: {e}")
+
+@st.cache_data(ttl=300, hash_funcs=_DF_HASH)
+def build_mensal_fig(df):
+    """Figura mensal por categoria dos relatórios (dict cacheado)"""
+    return DataAnalyzer(df).criar_grafico_mensal().to_dict()
+
+@st.cache_data(ttl=300)
+def build_pagamento_fig(pagamento_gastos):
+    """Figura de pizza por forma de pagamento (dict cacheado)"""
+    import plotly.express as px
+
+    fig = px.pie(
+        values=pagamento_gastos.values,
+        names=pagamento_gastos.index,
+        title="Distribuição por Forma de Pagamento"
+    )
+    return fig.to_dict()
 
 def show_dashboard():
     """Dashboard principal REDESENHADO - Interface moderna e intuitiva"""
@@ -88,175 +341,65 @@ def show_dashboard():
     )
     
     # Filtro por categoria
+    opcoes_categorias = _opcoes(df, 'categoria')
     categorias = st.sidebar.multiselect(
         "🏷️ Categorias:",
-        options=sorted(df['categoria'].unique()),
-        default=df['categoria'].unique()
+        options=opcoes_categorias,
+        default=opcoes_categorias
     )
     
-    # Aplicar filtros
-    df_filtrado = df[df['categoria'].isin(categorias)]
-    
-    # Filtro por período
-    if periodo != "Todos":
-        hoje = pd.Timestamp.now()
-        if periodo == "Últimos 7 dias":
-            data_limite = hoje - pd.Timedelta(days=7)
-        elif periodo == "Últimos 30 dias":
-            data_limite = hoje - pd.Timedelta(days=30)
-        elif periodo == "Este mês":
-            data_limite = pd.Timestamp(hoje.year, hoje.month, 1)
-        elif periodo == "Últimos 3 meses":
-            data_limite = hoje - pd.Timedelta(days=90)
-        elif periodo == "Este ano":
-            data_limite = pd.Timestamp(hoje.year, 1, 1)
-        
-        df_filtrado = df_filtrado[df_filtrado['data'] >= data_limite]
+    # Aplicar filtros (memoizado por seleção)
+    df_filtrado = filter_expenses(df, tuple(categorias), periodo)
 
     if df_filtrado.empty:
         st.warning("⚠️ Nenhum gasto encontrado com os filtros selecionados!")
         return
 
-    # Análise dos dados
-    analyzer = DataAnalyzer(df_filtrado)
-    stats = analyzer.get_estatisticas_basicas()
+    # Análise dos dados (memoizada por fatia filtrada). As três agregações
+    # são independentes e rodam em paralelo no primeiro cálculo — os kernels
+    # de groupby do pandas soltam o GIL
+    with ThreadPoolExecutor(max_workers=3) as ex:
+        f_stats = ex.submit(compute_stats, df_filtrado)
+        f_categorias = ex.submit(compute_categoria_gastos, df_filtrado)
+        f_top = ex.submit(compute_top_gastos, df_filtrado, 5)
+        stats = f_stats.result()
+        # Uma única agregação por categoria alimenta card, pizza e dicas
+        categoria_gastos = f_categorias.result()
+        top_gastos = f_top.result()
 
     # 🎯 MÉTRICAS PRINCIPAIS - CARDS DESTACADOS
     st.markdown("### 📈 Resumo Financeiro")
     
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        total_gastos = stats.get('total_gastos', 0)
-        st.markdown(f"""
-        <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
-                    padding: 1.5rem; border-radius: 15px; text-align: center; color: white; margin-bottom: 1rem;">
-            <h3 style="margin: 0; font-size: 1.1rem; opacity: 0.9;">💸 Total Gasto</h3>
-            <h2 style="margin: 0.5rem 0 0 0; font-size: 2rem; font-weight: bold;">
-                R$ {total_gastos:,.2f}
-            </h2>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        total_transacoes = stats.get('total_transacoes', 0)
-        media_gastos = stats.get('media_gastos', 0)
-        st.markdown(f"""
-        <div style="background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%); 
-                    padding: 1.5rem; border-radius: 15px; text-align: center; color: white; margin-bottom: 1rem;">
-            <h3 style="margin: 0; font-size: 1.1rem; opacity: 0.9;">📊 Transações</h3>
-            <h2 style="margin: 0.5rem 0 0 0; font-size: 2rem; font-weight: bold;">
-                {total_transacoes}
-            </h2>
-            <p style="margin: 0.2rem 0 0 0; font-size: 0.9rem; opacity: 0.8;">
-                Média: R$ {media_gastos:.2f}
-            </p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col3:
-        categoria_top = stats.get('categoria_mais_gasta', 'N/A')
-        st.markdown(f"""
-        <div style="background: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%); 
-                    padding: 1.5rem; border-radius: 15px; text-align: center; color: white; margin-bottom: 1rem;">
-            <h3 style="margin: 0; font-size: 1.1rem; opacity: 0.9;">🏆 Categoria Top</h3>
-            <h2 style="margin: 0.5rem 0 0 0; font-size: 1.5rem; font-weight: bold;">
-                {categoria_top}
-            </h2>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col4:
-        maior_gasto = stats.get('maior_gasto', 0)
-        menor_gasto = stats.get('menor_gasto', 0)
-        st.markdown(f"""
-        <div style="background: linear-gradient(135deg, #fa709a 0%, #fee140 100%); 
-                    padding: 1.5rem; border-radius: 15px; text-align: center; color: white; margin-bottom: 1rem;">
-            <h3 style="margin: 0; font-size: 1.1rem; opacity: 0.9;">💰 Maior Gasto</h3>
-            <h2 style="margin: 0.5rem 0 0 0; font-size: 1.6rem; font-weight: bold;">
-                R$ {maior_gasto:.2f}
-            </h2>
-            <p style="margin: 0.2rem 0 0 0; font-size: 0.9rem; opacity: 0.8;">
-                Menor: R$ {menor_gasto:.2f}
-            </p>
-        </div>
-        """, unsafe_allow_html=True)
+    total_gastos = stats.get('total_gastos', 0)
+    total_transacoes = stats.get('total_transacoes', 0)
+    media_gastos = stats.get('media_gastos', 0)
+    categoria_top = categoria_gastos.idxmax() if not categoria_gastos.empty else 'N/A'
+    maior_gasto = stats.get('maior_gasto', 0)
+    menor_gasto = stats.get('menor_gasto', 0)
+
+    # Os quatro cards saem num único st.markdown (grid CSS): uma mensagem
+    # de protocolo em vez de quatro, e só os números mudam por rerun
+    cards = "".join([
+        _CARD_TPL.format(cores='#667eea 0%, #764ba2 100%', titulo='💸 Total Gasto',
+                         tamanho='2rem', valor=f'R$ {total_gastos:,.2f}', rodape=''),
+        _CARD_TPL.format(cores='#f093fb 0%, #f5576c 100%', titulo='📊 Transações',
+                         tamanho='2rem', valor=total_transacoes,
+                         rodape=_CARD_RODAPE_TPL.format(texto=f'Média: R$ {media_gastos:.2f}')),
+        _CARD_TPL.format(cores='#4facfe 0%, #00f2fe 100%', titulo='🏆 Categoria Top',
+                         tamanho='1.5rem', valor=categoria_top, rodape=''),
+        _CARD_TPL.format(cores='#fa709a 0%, #fee140 100%', titulo='💰 Maior Gasto',
+                         tamanho='1.6rem', valor=f'R$ {maior_gasto:.2f}',
+                         rodape=_CARD_RODAPE_TPL.format(texto=f'Menor: R$ {menor_gasto:.2f}')),
+    ])
+    st.markdown(
+        f'<div style="display: grid; grid-template-columns: repeat(4, 1fr); gap: 1rem;">{cards}</div>',
+        unsafe_allow_html=True
+    )
 
     st.markdown("---")
 
     # 🎯 GRÁFICOS PRINCIPAIS - LAYOUT OTIMIZADO
-    col1, col2 = st.columns([2, 1])
-    
-    with col1:
-        st.markdown("### 📈 Evolução dos Gastos no Tempo")
-        try:
-            gastos_diarios = df_filtrado.groupby('data')['valor'].sum().reset_index()
-            
-            fig_linha = px.line(
-                gastos_diarios,
-                x='data',
-                y='valor',
-                title='',
-                labels={'valor': 'Valor (R$)', 'data': 'Data'},
-                color_discrete_sequence=['#667eea']
-            )
-            
-            fig_linha.update_layout(
-                height=400,
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='#333'),
-                xaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(0,0,0,0.1)'),
-                yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(0,0,0,0.1)')
-            )
-            
-            fig_linha.update_traces(
-                line=dict(width=3),
-                hovertemplate='<b>%{x}</b><br>R$ %{y:,.2f}<extra></extra>'
-            )
-            
-            st.plotly_chart(fig_linha, use_container_width=True)
-        except Exception as e:
-            st.error(f"Erro ao criar gráfico de linha: {e}")
-    
-    with col2:
-        st.markdown("### 🥧 Distribuição por Categoria")
-        try:
-            categoria_gastos = analyzer.gastos_por_categoria()
-            
-            colors = ['#667eea', '#764ba2', '#f093fb', '#f5576c', '#4facfe', '#00f2fe', '#fa709a', '#fee140']
-            
-            fig_pizza = px.pie(
-                values=categoria_gastos.values,
-                names=categoria_gastos.index,
-                title='',
-                color_discrete_sequence=colors
-            )
-            
-            fig_pizza.update_layout(
-                height=400,
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='#333'),
-                showlegend=True,
-                legend=dict(
-                    orientation="v",
-                    yanchor="middle",
-                    y=0.5,
-                    xanchor="left",
-                    x=1.05
-                )
-            )
-            
-            fig_pizza.update_traces(
-                textposition='inside',
-                textinfo='percent',
-                hovertemplate='<b>%{label}</b><br>R$ %{value:,.2f}<br>%{percent}<extra></extra>'
-            )
-            
-            st.plotly_chart(fig_pizza, use_container_width=True)
-        except Exception as e:
-            st.error(f"Erro ao criar gráfico de pizza: {e}")
+    render_dashboard_charts(df_filtrado, categoria_gastos)
 
     # 🎯 SEÇÃO DE INSIGHTS
     st.markdown("### 🎯 Insights e Recomendações")
@@ -265,38 +408,33 @@ def show_dashboard():
     
     with col1:
         st.markdown("#### 💸 Maiores Gastos do Período")
-        top_gastos = analyzer.get_top_gastos(5)
         if not top_gastos.empty:
-            for idx, gasto in top_gastos.iterrows():
-                data_formatada = gasto['data'].strftime('%d/%m/%Y')
-                st.markdown(f"""
-                <div style="background: #f8f9fa; padding: 1rem; margin: 0.5rem 0; 
-                           border-radius: 10px; border-left: 4px solid #667eea;">
-                    <strong>R$ {gasto['valor']:,.2f}</strong> - {gasto['categoria']}<br>
-                    <small style="color: #666;">{gasto['descricao']} • {data_formatada}</small>
-                </div>
-                """, unsafe_allow_html=True)
+            # itertuples evita o box de uma Series por linha; um único
+            # st.markdown no lugar de cinco componentes
+            html = "".join(
+                f'<div style="background: #f8f9fa; padding: 1rem; margin: 0.5rem 0; '
+                f'border-radius: 10px; border-left: 4px solid #667eea;">'
+                f'<strong>R$ {g.valor:,.2f}</strong> - {g.categoria}<br>'
+                f'<small style="color: #666;">{g.descricao} • {g.data:%d/%m/%Y}</small></div>'
+                for g in top_gastos.itertuples(index=False)
+            )
+            st.markdown(html, unsafe_allow_html=True)
     
     with col2:
         st.markdown("#### 📊 Resumo por Categoria")
-        categoria_resumo = df_filtrado.groupby('categoria').agg({
-            'valor': ['sum', 'count', 'mean']
-        }).round(2)
-        categoria_resumo.columns = ['Total (R$)', 'Qtd', 'Média (R$)']
-        categoria_resumo = categoria_resumo.sort_values('Total (R$)', ascending=False)
+        categoria_resumo = category_rollup(df_filtrado)
         
-        # Exibir como cards
-        for categoria, row in categoria_resumo.head().iterrows():
-            percentual = (row['Total (R$)'] / total_gastos) * 100
-            st.markdown(f"""
-            <div style="background: #f8f9fa; padding: 1rem; margin: 0.5rem 0; 
-                       border-radius: 10px; border-left: 4px solid #f5576c;">
-                <strong>{categoria}</strong><br>
-                <span style="color: #667eea; font-weight: bold;">R$ {row['Total (R$)']:,.2f}</span> 
-                ({percentual:.1f}%)<br>
-                <small style="color: #666;">{int(row['Qtd'])} gastos • Média R$ {row['Média (R$)']:.2f}</small>
-            </div>
-            """, unsafe_allow_html=True)
+        # Exibir como cards — um único st.markdown para as cinco linhas
+        html = "".join(
+            f'<div style="background: #f8f9fa; padding: 1rem; margin: 0.5rem 0; '
+            f'border-radius: 10px; border-left: 4px solid #f5576c;">'
+            f'<strong>{categoria}</strong><br>'
+            f'<span style="color: #667eea; font-weight: bold;">R$ {total:,.2f}</span> '
+            f'({(total / total_gastos) * 100:.1f}%)<br>'
+            f'<small style="color: #666;">{int(qtd)} gastos • Média R$ {media:.2f}</small></div>'
+            for categoria, total, qtd, media in categoria_resumo.itertuples()
+        )
+        st.markdown(html, unsafe_allow_html=True)
 
     # 🎯 CALL TO ACTION
     st.markdown("---")
@@ -321,7 +459,9 @@ def show_dashboard():
     if total_gastos > 0:
         categoria_dominante = stats.get('categoria_mais_gasta', '')
         if categoria_dominante:
-            categoria_valor = df_filtrado[df_filtrado['categoria'] == categoria_dominante]['valor'].sum()
+            # Reusa a agregação por categoria já calculada — nada de varrer
+            # o frame de novo só para derivar o percentual
+            categoria_valor = categoria_gastos.loc[categoria_dominante]
             categoria_pct = (categoria_valor / total_gastos) * 100
             
             if categoria_pct > 40:
@@ -412,18 +552,18 @@ def show_cadastro():
                 st.error("❌ O valor deve ser maior que zero!")
                 return
             
-            # Preparar dados para salvar
-            novo_gasto = {
-                'data': data_gasto,
-                'valor': float(valor_gasto),
-                'categoria': categoria,
-                'descricao': descricao,
-                'forma_pagamento': forma_pagamento
-            }
-            
+            # Linha nova já com os dtypes do frame cacheado — evita
+            # coerção de dtype (e cópia implícita) na hora do insert
+            df_novo = pd.DataFrame({
+                'data': pd.array([pd.Timestamp(data_gasto)], dtype='datetime64[ns]'),
+                'valor': pd.array([valor_gasto], dtype='float64'),
+                'categoria': pd.Categorical([categoria]),
+                'descricao': [descricao],
+                'forma_pagamento': pd.Categorical([forma_pagamento])
+            })
+
             # Tentar salvar no banco
             try:
-                df_novo = pd.DataFrame([novo_gasto])
                 success = data_collector.insert_new_expense(df_novo)
                 
                 if success:
@@ -441,13 +581,89 @@ def show_cadastro():
                     {f"- **Observações:** {observacoes}" if observacoes else ""}
                     """)
                     
-                    # Limpar cache
-                    st.cache_data.clear()
+                    # Anexa a linha nova ao frame cacheado e invalida só
+                    # os caches derivados dele
+                    store = _data_store()
+                    if store['df'] is not None:
+                        store['df'] = _preparar_df(
+                            pd.concat([store['df'], df_novo], ignore_index=True)
+                        )
+                    filter_expenses.clear()
+                    compute_stats.clear()
+                    compute_categoria_gastos.clear()
+                    compute_top_gastos.clear()
+                    to_csv_bytes.clear()
                 else:
                     st.error("❌ Erro ao registrar o gasto. Tente novamente.")
             except Exception as e:
                 st.error(f"❌ Erro ao processar registro: {str(e)}")
 
+
+@st.cache_data(hash_funcs=_DF_HASH)
+def to_csv_bytes(df):
+    """CSV da exportação — serializado uma vez por conjunto filtrado, em vez
+    de materializar a string inteira a cada rerun"""
+    try:
+        # Writer C multithreaded do pyarrow (já presente via streamlit)
+        import io
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+        buf = io.BytesIO()
+        pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), buf)
+        return buf.getvalue()
+    except Exception:
+        return df.to_csv(index=False).encode()
+
+
+@st.fragment
+def render_historico_tabela(df_filtrado, categorias_hist, pagamentos_hist, data_limite):
+    """Paginação/tabela em fragment: trocar de página ou de tamanho de página
+    não recomputa as métricas e filtros acima"""
+    st.subheader(f"📊 Exibindo {len(df_filtrado)} registros")
+
+    # Paginação
+    registros_por_pagina = st.selectbox("Registros por página:", [10, 25, 50])
+
+    if len(df_filtrado) > registros_por_pagina:
+        # Teto exato: "// + 1" superestimava quando a contagem era múltiplo
+        total_paginas = -(-len(df_filtrado) // registros_por_pagina)
+        pagina = st.number_input("Página:", 1, total_paginas, 1)
+        # Paginação no servidor: só a página pedida atravessa o banco
+        df_exibir = data_collector.load_page(
+            categorias=categorias_hist,
+            formas_pagamento=pagamentos_hist or None,
+            date_from=data_limite,
+            limit=registros_por_pagina,
+            offset=(pagina - 1) * registros_por_pagina
+        )
+        if df_exibir is None:
+            inicio = (pagina - 1) * registros_por_pagina
+            df_exibir = df_filtrado.iloc[inicio:inicio + registros_por_pagina]
+        st.write(f"Página {pagina} de {total_paginas}")
+    else:
+        df_exibir = df_filtrado
+
+    # Formatação fica no front-end (column_config): nada de loop Python
+    # por linha nem cópia do DataFrame para stringificar colunas
+    st.dataframe(
+        df_exibir,
+        column_config={
+            'data': st.column_config.DatetimeColumn('Data', format='DD/MM/YYYY'),
+            'valor': st.column_config.NumberColumn('Valor', format='R$ %.2f')
+        },
+        use_container_width=True,
+        hide_index=True
+    )
+
+    # Download
+    if not df_filtrado.empty:
+        st.download_button(
+            label="📥 Download dos Dados (CSV)",
+            data=to_csv_bytes(df_filtrado),
+            file_name=f'gastos_{datetime.now().strftime("%Y%m%d_%H%M")}.csv',
+            mime='text/csv'
+        )
+
 def show_historico():
     """Página de histórico completo"""
     st.title("📋 Histórico de Gastos")
@@ -478,18 +694,20 @@ def show_historico():
     col1, col2, col3 = st.columns(3)
     
     with col1:
+        opcoes_cat_hist = _opcoes(df, 'categoria')
         categorias_hist = st.multiselect(
             "Filtrar por Categoria:",
-            options=sorted(df['categoria'].unique()),
-            default=df['categoria'].unique()
+            options=opcoes_cat_hist,
+            default=opcoes_cat_hist
         )
     
     with col2:
         if 'forma_pagamento' in df.columns:
+            opcoes_pag_hist = _opcoes(df, 'forma_pagamento')
             pagamentos_hist = st.multiselect(
                 "Forma de Pagamento:",
-                options=sorted(df['forma_pagamento'].unique()),
-                default=df['forma_pagamento'].unique()
+                options=opcoes_pag_hist,
+                default=opcoes_pag_hist
             )
         else:
             pagamentos_hist = []
@@ -506,52 +724,23 @@ def show_historico():
     if pagamentos_hist and 'forma_pagamento' in df.columns:
         df_filtrado = df_filtrado[df_filtrado['forma_pagamento'].isin(pagamentos_hist)]
 
-    # Filtro por período
+    # Filtro por período — comparação vetorizada direto no array
+    # datetime64, sem Timestamp por elemento
+    data_limite = None
     if periodo_hist != "Todos":
-        hoje = pd.Timestamp.now()
-        if periodo_hist == "Últimos 30 dias":
-            data_limite = hoje - pd.Timedelta(days=30)
-        elif periodo_hist == "Últimos 90 dias":
-            data_limite = hoje - pd.Timedelta(days=90)
-        elif periodo_hist == "Este ano":
-            data_limite = pd.Timestamp(hoje.year, 1, 1)
-        
-        df_filtrado = df_filtrado[df_filtrado['data'] >= data_limite]
-
-    # Ordenar por data
-    df_filtrado = df_filtrado.sort_values('data', ascending=False)
-
-    st.subheader(f"📊 Exibindo {len(df_filtrado)} registros")
-
-    # Paginação
-    registros_por_pagina = st.selectbox("Registros por página:", [10, 25, 50])
-    
-    if len(df_filtrado) > registros_por_pagina:
-        total_paginas = (len(df_filtrado) // registros_por_pagina) + 1
-        pagina = st.number_input("Página:", 1, total_paginas, 1)
-        inicio = (pagina - 1) * registros_por_pagina
-        fim = inicio + registros_por_pagina
-        df_exibir = df_filtrado.iloc[inicio:fim]
-        st.write(f"Página {pagina} de {total_paginas}")
-    else:
-        df_exibir = df_filtrado
+        dias = PERIODOS_HISTORICO.get(periodo_hist)
+        if dias is not None:
+            data_limite = np.datetime64('today') - np.timedelta64(dias, 'D')
+        else:  # Este ano
+            data_limite = np.datetime64(f'{datetime.now().year}-01-01')
 
-    # Formatar para exibição
-    df_display = df_exibir.copy()
-    df_display['data'] = df_display['data'].dt.strftime('%d/%m/%Y')
-    df_display['valor'] = df_display['valor'].apply(lambda x: f"R$ {x:,.2f}")
+        df_filtrado = df_filtrado[df_filtrado['data'].values >= data_limite]
 
-    st.dataframe(df_display, use_container_width=True, hide_index=True)
+    # Ordenar por data — o frame já vem ordenado ascendente do load_data,
+    # então basta inverter a vista, sem novo sort O(n log n)
+    df_filtrado = df_filtrado.iloc[::-1]
 
-    # Download
-    if not df_filtrado.empty:
-        csv = df_filtrado.to_csv(index=False)
-        st.download_button(
-            label="📥 Download dos Dados (CSV)",
-            data=csv,
-            file_name=f'gastos_{datetime.now().strftime("%Y%m%d_%H%M")}.csv',
-            mime='text/csv'
-        )
+    render_historico_tabela(df_filtrado, categorias_hist, pagamentos_hist, data_limite)
 
 def show_relatorios():
     """Página de relatórios avançados"""
@@ -567,8 +756,7 @@ def show_relatorios():
     # Relatório mensal
     st.subheader("📅 Gastos Mensais por Categoria")
     try:
-        fig_mensal = analyzer.criar_grafico_mensal()
-        st.plotly_chart(fig_mensal, use_container_width=True)
+        st.plotly_chart(build_mensal_fig(df), use_container_width=True)
     except Exception as e:
         st.error(f"Erro ao gerar gráfico mensal: {e}")
 
@@ -577,17 +765,12 @@ def show_relatorios():
     # Comparativo por forma de pagamento
     if 'forma_pagamento' in df.columns:
         st.subheader("💳 Gastos por Forma de Pagamento")
-        pagamento_gastos = analyzer.gastos_por_forma_pagamento()
+        pagamento_gastos = analyzer.gastos_por_forma_pagamento
         
         col1, col2 = st.columns(2)
         
         with col1:
-            fig_pagamento = px.pie(
-                values=pagamento_gastos.values,
-                names=pagamento_gastos.index,
-                title="Distribuição por Forma de Pagamento"
-            )
-            st.plotly_chart(fig_pagamento, use_container_width=True)
+            st.plotly_chart(build_pagamento_fig(pagamento_gastos), use_container_width=True)
         
         with col2:
             st.write("**Resumo por Forma de Pagamento:**")
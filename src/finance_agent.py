@@ -1,9 +1,15 @@
 import os
 import json
+import time
+import hashlib
+import random
+from collections import deque
+from functools import lru_cache
 from datetime import datetime, date, timedelta
-import pytz
+from zoneinfo import ZoneInfo
 from typing import List, Dict, Any, Optional
 import pandas as pd
+import numpy as np
 from dotenv import load_dotenv
 import re
 from data_collector import DataCollector
@@ -12,6 +18,100 @@ from memory_manager import FinanceBotMemory
 
 load_dotenv()
 
+# Fuso único do módulo — ZoneInfo (stdlib, C) é mais barato que pytz em
+# datetime.now(tz) e dispensa a semântica de localize()
+_BR_TZ = ZoneInfo('America/Sao_Paulo')
+
+# Segundo nível de cache do LLM em disco (opcional): respostas repetidas
+# sobrevivem a restarts do processo — o lru_cache em memória morre com ele.
+# Prompts dependentes de dados mudam de texto quando os dados mudam, então
+# o expire de 1h cobre o resto
+try:
+    from diskcache import Cache as _DiskCache
+    _GROQ_DISK_CACHE = _DiskCache(os.path.join(os.path.dirname(__file__), '.groq_cache'))
+except ImportError:
+    _GROQ_DISK_CACHE = None
+
+# Parsing local de período: uma alternação compilada resolve mensagens com
+# mês explícito sem round-trip ao LLM
+_MESES_PT = {
+    'janeiro': 1, 'jan': 1, 'fevereiro': 2, 'fev': 2, 'março': 3, 'marco': 3,
+    'mar': 3, 'abril': 4, 'abr': 4, 'maio': 5, 'mai': 5, 'junho': 6, 'jun': 6,
+    'julho': 7, 'jul': 7, 'agosto': 8, 'ago': 8, 'setembro': 9, 'set': 9,
+    'outubro': 10, 'out': 10, 'novembro': 11, 'nov': 11,
+    'dezembro': 12, 'dez': 12,
+}
+_NOMES_MES = ['', 'janeiro', 'fevereiro', 'março', 'abril', 'maio', 'junho',
+              'julho', 'agosto', 'setembro', 'outubro', 'novembro', 'dezembro']
+_MES_NOME_RE = re.compile(
+    r'\b(' + '|'.join(sorted(_MESES_PT, key=len, reverse=True)) + r')\b'
+    r'(?:\s+de\s+|\s*/\s*|\s+)(\d{4})',
+    re.IGNORECASE,
+)
+_MES_ANO_RE = re.compile(r'\b(\d{1,2})\s*/\s*(\d{4})\b')
+
+# Vocabulário financeiro para o caminho rápido de classificação: tokenizar
+# + interseção de set é O(n) com lookups O(1), sem varredura de substrings
+_PALAVRAS_FINANCAS = frozenset({
+    'gasto', 'gastos', 'gastei', 'gastando', 'despesa', 'despesas',
+    'receita', 'receitas', 'orçamento', 'orcamento', 'economia',
+    'economizar', 'poupar', 'poupança', 'poupanca', 'dinheiro', 'categoria',
+    'categorias', 'análise', 'analise', 'analisar', 'relatório', 'relatorio',
+    'planejamento', 'investimento', 'investimentos', 'investir', 'cartão',
+    'cartao', 'banco', 'pagamento', 'pagamentos', 'pix', 'salário',
+    'salario', 'conta', 'contas', 'saldo', 'real', 'reais',
+})
+_TOKEN_RE = re.compile(r'\w+')
+
+# json nativo como fallback do orjson (parser C/Rust, ~2-3x em JSON curto)
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+def _extract_json(texto):
+    """Extrai o bloco {...} por find/rfind — a regex gulosa com DOTALL é
+    O(n²) no pior caso em respostas longas"""
+    a, b = texto.find('{'), texto.rfind('}')
+    if a == -1 or b <= a:
+        return None
+    try:
+        return _json_loads(texto[a:b + 1])
+    except Exception:
+        return None
+
+# Cadastro óbvio ("gastei 50 com uber") e pedidos de dica roteiam local,
+# sem pagar o classificador LLM
+_GASTO_RE = re.compile(
+    r'gastei\s+(?:r\$\s*)?(\d+(?:[.,]\d+)?)\s+(?:com|de|em|no|na)\s+([\wáéíóúâêôãõç]+)',
+    re.IGNORECASE,
+)
+_PALAVRAS_CONSELHO = frozenset({
+    'dica', 'dicas', 'conselho', 'conselhos',
+    'sugestão', 'sugestao', 'sugestões', 'sugestoes'
+})
+
+# Respostas fixas para assunto fora de finanças
+_RESPOSTAS_FORA_DE_TOPICO = (
+    "Sou especialista em finanças pessoais! Como posso ajudar com seus gastos ou orçamento?",
+    "Prefiro focar em suas finanças. Quer analisar seus gastos?",
+    "Que tal falarmos sobre como está seu controle financeiro?",
+    "Minha especialidade são finanças! Posso ajudar com dicas de economia?"
+)
+
+# Normalização de categoria no caminho de escrita: dict e allow-list
+# construídos uma vez no módulo; membership vira lookup O(1)
+_CATEGORIA_MAP = {
+    'comida': 'Alimentação', 'alimentacao': 'Alimentação',
+    'transporte': 'Transporte', 'uber': 'Transporte',
+    'lazer': 'Lazer', 'diversao': 'Lazer',
+    'saude': 'Saúde', 'medico': 'Saúde'
+}
+_CATEGORIAS_VALIDAS = frozenset({
+    'Alimentação', 'Transporte', 'Lazer', 'Saúde', 'Roupas', 'Mensalidades', 'Outros'
+})
+
+
 class FinanceBot:
     """FinanceBot Inteligente - Usa IA para parsing e menos lógica condicional"""
     
@@ -20,38 +120,167 @@ class FinanceBot:
         if not self.api_key:
             raise ValueError("❌ GROQ_API_KEY não encontrada")
         
-        self.timezone = pytz.timezone('America/Sao_Paulo')
+        self.timezone = _BR_TZ
         
         from groq import Groq
         self.client = Groq(api_key=self.api_key)
+        self.model_main = "llama-3.3-70b-versatile"
+        # Roteamento/classificação no modelo pequeno: fração do TTFT e do
+        # custo para prompts cuja saída é um JSON curto
+        self.model_fast = "llama-3.1-8b-instant"
         self.data_collector = DataCollector()
-        self.memory = FinanceBotMemory()
-        self.chat_history = []
-        
-        # Configurações do bot
-        self.FINANCE_TOPICS = [
-            'gastos', 'despesas', 'receitas', 'orçamento', 'economia', 'dinheiro',
-            'categorias', 'análise', 'relatório', 'planejamento', 'investimento'
-        ]
+
+        # Cache do frame de gastos: consultas consecutivas no chat reusam o
+        # frame parseado; _register_expense invalida ao gravar
+        self._df_cache = None
+        self._df_cache_ts = 0.0
+        self._dates_np = None
+        # Perfil recalculado só quando houve escrita desde a última leitura
+        self._memory_dirty = True
+        self._df_cache_ttl = 30.0
+        # Timestamp do turno corrente (capturado uma vez por chat())
+        self._now = None
+
+        # Memória compartilha o collector e o cache do frame — uma única ida
+        # ao banco serve perfil e análises
+        self.memory = FinanceBotMemory(data_collector=self.data_collector,
+                                       loader=self._get_cached_df)
+        # deque com maxlen: append O(1) com descarte automático, sem
+        # realocar a lista a cada turno
+        self.chat_history = deque(maxlen=10)
+        
+        # Configurações do bot — aponta para o vocabulário do módulo, sem
+        # reconstruir a lista por instância
+        self.FINANCE_TOPICS = _PALAVRAS_FINANCAS
         
         print("✅ FinanceBot inicializado com SUCESSO!")
 
-    def _call_groq_ai(self, prompt: str, max_tokens: int = 500) -> str:
-        """Chamada simplificada para IA"""
+    @lru_cache(maxsize=512)
+    def _call_groq_cached(self, prompt: str, max_tokens: int, model: str,
+                          json_mode: bool = False) -> str:
+        """Resposta memoizada por (prompt, max_tokens)
+
+        Prompts repetidos (roteamento da mesma mensagem, dicas, off-topic)
+        não pagam round-trip; prompts dependentes de dados mudam de texto
+        quando os dados mudam, então não ficam obsoletos. Erros propagam e
+        não entram no cache.
+        """
+        chave = None
+        if _GROQ_DISK_CACHE is not None:
+            chave = hashlib.sha1(f'{model}|{max_tokens}|{prompt}'.encode()).hexdigest()
+            cached = _GROQ_DISK_CACHE.get(chave)
+            if cached is not None:
+                return cached
+
+        kwargs = dict(
+            messages=[{"role": "user", "content": prompt}],
+            model=model,
+            temperature=0.3,
+            max_tokens=max_tokens
+        )
+        if json_mode:
+            # O endpoint garante JSON válido; o _extract_json vira só rede
+            # de segurança para vazamento de prosa
+            kwargs['response_format'] = {"type": "json_object"}
+        completion = self.client.chat.completions.create(**kwargs)
+        content = completion.choices[0].message.content
+
+        if chave is not None:
+            _GROQ_DISK_CACHE.set(chave, content, expire=3600)
+        return content
+
+    def _call_groq_ai(self, prompt: str, max_tokens: int = 500, stream: bool = False,
+                      model: str = None, json_mode: bool = False):
+        """Chamada simplificada para IA
+
+        Com stream=True devolve um iterador de trechos: o primeiro token
+        chega em ~100ms em vez de esperar a geração completa.
+        """
+        model = model or self.model_main
         try:
+            if not stream:
+                return self._call_groq_cached(prompt, max_tokens, model, json_mode)
             completion = self.client.chat.completions.create(
                 messages=[{"role": "user", "content": prompt}],
-                model="llama-3.3-70b-versatile",
+                model=model,
                 temperature=0.3,
-                max_tokens=max_tokens
+                max_tokens=max_tokens,
+                stream=True
             )
-            return completion.choices[0].message.content
+            return (chunk.choices[0].delta.content or '' for chunk in completion)
         except Exception as e:
             return f"Erro: {str(e)}"
 
+    def _parse_date_fast(self, message: str) -> Optional[Dict[str, Any]]:
+        """Extrai período com regex local; None quando só o LLM resolve"""
+        message_lower = message.lower()
+
+        m = _MES_NOME_RE.search(message_lower)
+        if m:
+            mes, ano = _MESES_PT[m.group(1).lower()], int(m.group(2))
+            return {
+                "type": "specific_month",
+                "month": mes,
+                "year": ano,
+                "description": f"{_NOMES_MES[mes]} de {ano}"
+            }
+
+        m = _MES_ANO_RE.search(message_lower)
+        if m and 1 <= int(m.group(1)) <= 12:
+            mes, ano = int(m.group(1)), int(m.group(2))
+            return {
+                "type": "specific_month",
+                "month": mes,
+                "year": ano,
+                "description": f"{_NOMES_MES[mes]} de {ano}"
+            }
+
+        if 'este mês' in message_lower or 'esse mês' in message_lower or 'mês atual' in message_lower:
+            now = self._agora()
+            return {
+                "type": "current_month",
+                "month": now.month,
+                "year": now.year,
+                "description": "este mês"
+            }
+
+        return None
+
+    def _parse_periods_multi(self, message: str) -> List[Dict[str, Any]]:
+        """Todos os períodos explícitos da mensagem (para comparações)"""
+        lower = message.lower()
+        periods = []
+        vistos = set()
+        for m in _MES_NOME_RE.finditer(lower):
+            mes, ano = _MESES_PT[m.group(1)], int(m.group(2))
+            if (mes, ano) not in vistos:
+                vistos.add((mes, ano))
+                periods.append({
+                    "type": "specific_month",
+                    "month": mes,
+                    "year": ano,
+                    "description": f"{_NOMES_MES[mes]} de {ano}"
+                })
+        for m in _MES_ANO_RE.finditer(lower):
+            mes, ano = int(m.group(1)), int(m.group(2))
+            if 1 <= mes <= 12 and (mes, ano) not in vistos:
+                vistos.add((mes, ano))
+                periods.append({
+                    "type": "specific_month",
+                    "month": mes,
+                    "year": ano,
+                    "description": f"{_NOMES_MES[mes]} de {ano}"
+                })
+        return periods
+
     def _ai_parse_date(self, message: str) -> Dict[str, Any]:
         """IA analisa e extrai período da mensagem"""
-        current_date = datetime.now(self.timezone).strftime('%d/%m/%Y')
+        # Caminho rápido local — só mensagens ambíguas pagam o LLM
+        parsed = self._parse_date_fast(message)
+        if parsed is not None:
+            return parsed
+
+        current_date = self._agora().strftime('%d/%m/%Y')
         
         prompt = f"""
         Analise esta mensagem e extraia informações de período: "{message}"
@@ -71,18 +300,15 @@ class FinanceBot:
         - "este mês" → {{"type": "current_month", "month": null, "year": null, "description": "este mês"}}
         """
         
-        ai_response = self._call_groq_ai(prompt, 200)
+        # JSON de ~60 tokens; teto folgado mas sem pagar geração à toa
+        ai_response = self._call_groq_ai(prompt, 120, model=self.model_fast, json_mode=True)
         
-        try:
-            # Extrair JSON da resposta da IA
-            json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-        except:
-            pass
+        parsed = _extract_json(ai_response)
+        if parsed is not None:
+            return parsed
         
         # Fallback para mês atual
-        now = datetime.now(self.timezone)
+        now = self._agora()
         return {
             "type": "current_month",
             "month": now.month,
@@ -90,68 +316,112 @@ class FinanceBot:
             "description": "este mês"
         }
 
-    def _ai_classify_intent(self, message: str) -> Dict[str, Any]:
-        """IA classifica a intenção do usuário"""
+    def _ai_route(self, message: str) -> Dict[str, Any]:
+        """Uma chamada única devolve relevância, intenção e período
+
+        Funde as três viagens sequenciais à IA (relevância, classificação e
+        parsing de data): a latência de rede é paga uma vez por turno.
+        """
+        current_date = self._agora().strftime('%d/%m/%Y')
         prompt = f"""
-        Classifique esta mensagem financeira: "{message}"
-        
+        Analise esta mensagem enviada a um assistente de finanças pessoais: "{message}"
+        Data atual: {current_date}
+
         Retorne APENAS no formato JSON:
         {{
+            "is_finance": true_ou_false,
             "intent": "analyze|register|advice|chat",
             "confidence": 0.0_a_1.0,
-            "data": {{"valor": null, "categoria": null, "descricao": null}}
+            "data": {{"valor": null, "categoria": null, "descricao": null}},
+            "period": {{"type": "specific_month|current_month|current_year", "month": número_ou_null, "year": número_ou_null, "description": "descrição_amigável"}}
         }}
-        
+
         Intenções:
-        - analyze: usuário quer ver/analisar gastos existentes
-        - register: usuário quer cadastrar um novo gasto
-        - advice: usuário quer dicas/conselhos financeiros  
+        - analyze: usuário quer ver/analisar gastos existentes (preencha "period")
+        - register: usuário quer cadastrar um novo gasto (extraia os dados em "data")
+        - advice: usuário quer dicas/conselhos financeiros
         - chat: conversa geral sobre finanças
-        
-        Se register, extraia dados do gasto no campo "data".
+
+        "is_finance" é false apenas se a mensagem não tem relação com finanças pessoais.
         """
-        
-        ai_response = self._call_groq_ai(prompt, 300)
-        
-        try:
-            json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-        except:
-            pass
-        
+
+        ai_response = self._call_groq_ai(prompt, 250, model=self.model_fast, json_mode=True)
+
+        parsed = _extract_json(ai_response)
+        if parsed is not None:
+            return parsed
+
         # Fallback
-        return {"intent": "chat", "confidence": 0.5, "data": {}}
+        return {"is_finance": True, "intent": "chat", "confidence": 0.5, "data": {}}
+
+    def _agora(self) -> datetime:
+        """Relógio do turno: dentro de um chat() todos os usos compartilham
+        o mesmo datetime.now, capturado uma vez"""
+        return self._now if self._now is not None else datetime.now(self.timezone)
+
+    def _get_cached_df(self) -> pd.DataFrame:
+        """DataFrame de gastos com cache de 30s"""
+        if self._df_cache is None or time.monotonic() - self._df_cache_ts > self._df_cache_ttl:
+            df = self.data_collector.load_from_database()
+            if not df.empty:
+                # Ordenado por data: filtros de período viram busca binária
+                # + fatia em vez de máscara booleana sobre o frame inteiro
+                df = df.sort_values('data').reset_index(drop=True)
+                # O collector já devolve category; cobre o fallback de amostra
+                for col in ('categoria', 'forma_pagamento'):
+                    if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+                        df[col] = df[col].astype('category')
+                self._dates_np = df['data'].values
+            else:
+                self._dates_np = None
+            self._df_cache = df
+            self._df_cache_ts = time.monotonic()
+        return self._df_cache
 
     def _query_expenses_by_period(self, period_info: Dict[str, Any]) -> pd.DataFrame:
-        """Consulta gastos do banco baseado no período"""
-        df = self.data_collector.load_from_database()
+        """Consulta gastos baseado no período"""
+        period_type = period_info.get('type')
+        now = self._agora()
+
+        # Janela [start, end) do período pedido
+        month = year = None
+        if period_type == 'specific_month':
+            month, year = period_info.get('month'), period_info.get('year')
+        elif period_type == 'current_month':
+            month, year = now.month, now.year
+        elif period_type == 'current_year':
+            year = period_info.get('year') or now.year
+
+        if not year:
+            return self._get_cached_df()
+
+        if month:
+            end_year, end_month = (year + 1, 1) if month == 12 else (year, month + 1)
+            start = np.datetime64(f'{year:04d}-{month:02d}-01')
+            end = np.datetime64(f'{end_year:04d}-{end_month:02d}-01')
+        else:
+            start = np.datetime64(f'{year:04d}-01-01')
+            end = np.datetime64(f'{year + 1:04d}-01-01')
+
+        # Cache frio: o predicado vai para o SQL e só a janela atravessa o
+        # banco, sem materializar o histórico inteiro
+        if self._df_cache is None or time.monotonic() - self._df_cache_ts > self._df_cache_ttl:
+            return self.data_collector.load_range(start, end)
+
+        # Cache quente, ordenado por data: localizar as bordas é O(log N) e
+        # a fatia devolve uma vista, sem copiar o frame
+        df = self._df_cache
         if df.empty:
             return df
-        
-        period_type = period_info.get('type')
-        now = datetime.now(self.timezone)
-        
-        filters = {
-            'specific_month': lambda: (
-                (df['data'].dt.month == period_info.get('month')) & 
-                (df['data'].dt.year == period_info.get('year'))
-            ),
-            'current_month': lambda: (
-                (df['data'].dt.month == now.month) & 
-                (df['data'].dt.year == now.year)
-            ),
-            'current_year': lambda: df['data'].dt.year == period_info.get('year', now.year)
-        }
-        
-        filter_func = filters.get(period_type, lambda: df.index >= 0)
-        return df[filter_func()]
+        lo, hi = self._dates_np.searchsorted([start, end])
+        return df.iloc[lo:hi]
 
-    def _generate_analysis(self, user_message: str) -> str:
+    def _generate_analysis(self, user_message: str, period_info: Optional[Dict[str, Any]] = None, stream: bool = False):
         """Gera análise usando IA + dados reais"""
         try:
-            # IA parseia o período solicitado
-            period_info = self._ai_parse_date(user_message)
+            # Período pode vir pré-roteado da chamada única; senão parseia
+            if not period_info or not period_info.get('type'):
+                period_info = self._ai_parse_date(user_message)
             
             # Consulta dados reais
             df_period = self._query_expenses_by_period(period_info)
@@ -159,21 +429,27 @@ class FinanceBot:
             if df_period.empty:
                 return f"Não encontrei gastos para {period_info.get('description', 'esse período')}.\n\nQue tal cadastrar alguns gastos? 😊"
             
-            # Calcular métricas
-            total = float(df_period['valor'].sum())
-            transacoes = len(df_period)
-            media = float(df_period['valor'].mean())
-            
-            # Top categorias
-            top_categories = df_period.groupby('categoria')['valor'].sum().sort_values(ascending=False)
+            # Uma única agregação por categoria; totais derivados dela em
+            # vez de três passadas separadas sobre a coluna valor
+            agg = df_period.groupby('categoria', observed=True, sort=False)['valor'].agg(['sum', 'count'])
+            total = float(agg['sum'].sum())
+            transacoes = int(agg['count'].sum())
+            media = total / transacoes
+            top_categories = agg['sum'].sort_values(ascending=False)
             
             # IA gera resposta natural baseada nos dados
+            # Percentuais do top-3 numa divisão vetorizada única
+            top3 = top_categories.head(3)
+            pct = (top3 / total * 100).round(1)
             data_summary = {
                 'periodo': period_info.get('description'),
                 'total': total,
                 'transacoes': transacoes,
                 'media': media,
-                'categorias': [(cat, float(val)) for cat, val in top_categories.head(3).items()]
+                'categorias': [
+                    {'categoria': str(cat), 'valor': float(val), 'pct': float(p)}
+                    for cat, val, p in zip(top3.index, top3.values, pct.values)
+                ]
             }
             
             ai_prompt = f"""
@@ -194,12 +470,51 @@ class FinanceBot:
             [dica personalizada]"
             """
             
-            return self._call_groq_ai(ai_prompt, 600)
+            return self._call_groq_ai(ai_prompt, 600, stream=stream)
             
         except Exception as e:
             return f"Não consegui analisar os dados. Erro: {str(e)}"
 
-    def _register_expense(self, expense_data: Dict) -> str:
+    def _generate_multi_period_analysis(self, periods: List[Dict[str, Any]], stream: bool = False):
+        """Análise comparativa de vários períodos em UMA chamada à IA
+
+        Os resumos de todos os períodos vão juntos no prompt: N períodos
+        custam uma viagem de rede, não N.
+        """
+        try:
+            summaries = []
+            for period_info in periods:
+                df_period = self._query_expenses_by_period(period_info)
+                if df_period.empty:
+                    summaries.append({'periodo': period_info.get('description'),
+                                      'total': 0.0, 'transacoes': 0, 'categorias': []})
+                    continue
+                agg = df_period.groupby('categoria', observed=True, sort=False)['valor'].agg(['sum', 'count'])
+                summaries.append({
+                    'periodo': period_info.get('description'),
+                    'total': float(agg['sum'].sum()),
+                    'transacoes': int(agg['count'].sum()),
+                    'categorias': [(str(c), float(v)) for c, v in agg['sum'].nlargest(3).items()]
+                })
+
+            ai_prompt = f"""
+            Compare estes períodos de gastos do usuário (DADOS REAIS):
+
+            Dados: {json.dumps(summaries, ensure_ascii=False)}
+
+            Regras:
+            - Destaque as diferenças de total e das principais categorias
+            - Inclua os valores exatos dos dados
+            - Use linguagem natural e amigável
+            - Adicione uma dica prática ao final
+            """
+
+            return self._call_groq_ai(ai_prompt, 600, stream=stream)
+
+        except Exception as e:
+            return f"Não consegui comparar os períodos. Erro: {str(e)}"
+
+    def _register_expense(self, expense_data: Dict, stream: bool = False):
         """Registra novo gasto no banco"""
         try:
             valor = float(expense_data.get('valor', 0))
@@ -210,18 +525,12 @@ class FinanceBot:
             descricao = expense_data.get('descricao', 'Gasto via FinanceBot')
             
             # Mapear categoria para padrão
-            categoria_map = {
-                'comida': 'Alimentação', 'alimentacao': 'Alimentação',
-                'transporte': 'Transporte', 'uber': 'Transporte',
-                'lazer': 'Lazer', 'diversao': 'Lazer',
-                'saude': 'Saúde', 'medico': 'Saúde'
-            }
-            
-            categoria_final = categoria_map.get(categoria.lower(), categoria.title())
-            if categoria_final not in ["Alimentação", "Transporte", "Lazer", "Saúde", "Roupas", "Mensalidades", "Outros"]:
+            categoria_final = _CATEGORIA_MAP.get(categoria.lower(), categoria.title())
+            if categoria_final not in _CATEGORIAS_VALIDAS:
                 categoria_final = "Outros"
             
-            novo_gasto = pd.DataFrame([{
+            # Dict direto para o executemany — sem DataFrame de uma linha
+            success = self.data_collector.insert_expenses([{
                 'data': date.today(),
                 'valor': valor,
                 'categoria': categoria_final,
@@ -229,10 +538,9 @@ class FinanceBot:
                 'forma_pagamento': 'FinanceBot'
             }])
             
-            success = self.data_collector.insert_new_expense(novo_gasto)
-            
             if success:
-                self.memory.update_memory()
+                self._df_cache = None
+                self._memory_dirty = True
                 data_hoje = date.today().strftime('%d/%m')
                 
                 # IA gera resposta personalizada
@@ -247,16 +555,20 @@ class FinanceBot:
                 Seja conciso e motivador.
                 """
                 
-                return self._call_groq_ai(ai_prompt, 300)
+                return self._call_groq_ai(ai_prompt, 300, stream=stream)
             else:
                 return "❌ Não consegui salvar no banco. Tente novamente."
                 
         except Exception as e:
             return f"❌ Erro ao processar: {str(e)}"
 
-    def _get_advice(self) -> str:
+    def _get_advice(self, stream: bool = False):
         """IA gera conselhos baseados no perfil do usuário"""
-        self.memory.update_memory()
+        # Sem escrita desde a última leitura, o perfil atual continua válido
+        # (o TTL de 1h do FinanceBotMemory cobre mudanças externas)
+        if self._memory_dirty:
+            self.memory.update_memory()
+            self._memory_dirty = False
         
         # Dados do perfil para IA
         profile_data = {
@@ -278,71 +590,91 @@ class FinanceBot:
         Máximo 4 dicas.
         """
         
-        return self._call_groq_ai(ai_prompt, 500)
-
-    def _is_finance_related(self, message: str) -> bool:
-        """Verifica se mensagem é sobre finanças usando IA"""
-        prompt = f"""
-        Esta mensagem é sobre finanças pessoais? "{message}"
-        
-        Tópicos financeiros: gastos, despesas, dinheiro, orçamento, economia, investimento, poupança, cartão, banco, pagamento, receita, categoria, planejamento.
-        
-        Responda apenas: SIM ou NAO
-        """
-        
-        ai_response = self._call_groq_ai(prompt, 50)
-        return "SIM" in ai_response.upper()
+        return self._call_groq_ai(ai_prompt, 500, stream=stream)
 
     def _handle_off_topic(self) -> str:
         """Resposta para assuntos não financeiros"""
-        responses = [
-            "Sou especialista em finanças pessoais! Como posso ajudar com seus gastos ou orçamento?",
-            "Prefiro focar em suas finanças. Quer analisar seus gastos?",
-            "Que tal falarmos sobre como está seu controle financeiro?",
-            "Minha especialidade são finanças! Posso ajudar com dicas de economia?"
-        ]
-        import random
-        return random.choice(responses)
+        return random.choice(_RESPOSTAS_FORA_DE_TOPICO)
+
+    def _dispatch(self, message: str, stream: bool = False):
+        """Roteia a mensagem para o handler da intenção; None = fora de tópico"""
+        # Roteamento local para os casos óbvios; só mensagens ambíguas
+        # pagam a chamada única de roteamento da IA
+        lower = message.lower()
+        tokens = _TOKEN_RE.findall(lower)
+        m = _GASTO_RE.search(message)
+        if m:
+            intent_result = {
+                'intent': 'register',
+                'confidence': 1.0,
+                'data': {
+                    'valor': float(m.group(1).replace(',', '.')),
+                    'categoria': m.group(2),
+                    'descricao': message.strip()
+                }
+            }
+        elif not _PALAVRAS_CONSELHO.isdisjoint(tokens):
+            intent_result = {'intent': 'advice', 'confidence': 1.0, 'data': {}}
+        elif ('comparar' in lower or ' vs ' in lower) and \
+                len(periods := self._parse_periods_multi(message)) >= 2:
+            # Comparações explícitas entre períodos: uma chamada só
+            return self._generate_multi_period_analysis(periods, stream=stream)
+        else:
+            intent_result = self._ai_route(message)
+            # Só rejeita como fora de tópico se nem o vocabulário local bate
+            if not intent_result.get('is_finance', True) and _PALAVRAS_FINANCAS.isdisjoint(tokens):
+                return None
+        intent = intent_result.get('intent', 'chat')
+        period_info = intent_result.get('period')
+
+        # Roteamento baseado na intenção
+        handlers = {
+            'analyze': lambda: self._generate_analysis(message, period_info=period_info, stream=stream),
+            'register': lambda: self._register_expense(intent_result.get('data') or {}, stream=stream),
+            'advice': lambda: self._get_advice(stream=stream),
+            'chat': lambda: self._general_finance_chat(message, stream=stream)
+        }
+
+        handler = handlers.get(intent, handlers['chat'])
+        return handler()
+
+    def record_exchange(self, message: str, result: str):
+        """Registra um turno no histórico (maxlen do deque descarta o excedente)"""
+        self.chat_history.append({"role": "user", "content": message})
+        self.chat_history.append({"role": "assistant", "content": result})
 
     def chat(self, message: str) -> str:
         """Método principal - processamento inteligente"""
         try:
-            # Verificar se é sobre finanças
-            if not self._is_finance_related(message):
+            self._now = datetime.now(self.timezone)
+            result = self._dispatch(message)
+            if result is None:
                 return self._handle_off_topic()
-            
-            # IA classifica intenção
-            intent_result = self._ai_classify_intent(message)
-            intent = intent_result.get('intent', 'chat')
-            
-            # Roteamento baseado na intenção
-            handlers = {
-                'analyze': lambda: self._generate_analysis(message),
-                'register': lambda: self._register_expense(intent_result.get('data', {})),
-                'advice': lambda: self._get_advice(),
-                'chat': lambda: self._general_finance_chat(message)
-            }
-            
-            handler = handlers.get(intent, handlers['chat'])
-            result = handler()
-            
-            # Manter histórico
-            self.chat_history.append({"role": "user", "content": message})
-            self.chat_history.append({"role": "assistant", "content": result})
-            
-            # Limitar histórico
-            if len(self.chat_history) > 10:
-                self.chat_history = self.chat_history[-10:]
-            
+            self.record_exchange(message, result)
             return result
             
         except Exception as e:
             return f"Estou aqui para ajudar com suas finanças! Erro: {str(e)}"
 
-    def _general_finance_chat(self, message: str) -> str:
+    def chat_stream(self, message: str):
+        """chat() em streaming: devolve str ou um iterador de trechos.
+
+        Quem consome o iterador deve concatenar os trechos e chamar
+        record_exchange() para manter o histórico.
+        """
+        try:
+            self._now = datetime.now(self.timezone)
+            result = self._dispatch(message, stream=True)
+            if result is None:
+                return self._handle_off_topic()
+            return result
+        except Exception as e:
+            return f"Estou aqui para ajudar com suas finanças! Erro: {str(e)}"
+
+    def _general_finance_chat(self, message: str, stream: bool = False):
         """Chat geral sobre finanças usando IA"""
         context = self.memory.get_personalized_context()
-        current_time = datetime.now(self.timezone).strftime('%d/%m/%Y %H:%M:%S')
+        current_time = self._agora().strftime('%d/%m/%Y %H:%M:%S')
         
         ai_prompt = f"""
         Você é o FinanceBot, assistente financeiro amigável.
@@ -366,14 +698,17 @@ class FinanceBot:
         try:
             completion = self.client.chat.completions.create(
                 messages=[{"role": "system", "content": ai_prompt}],
-                model="llama-3.3-70b-versatile",
+                model=self.model_main,
                 temperature=0.4,
-                max_tokens=400
+                max_tokens=400,
+                stream=stream
             )
+            if stream:
+                return (chunk.choices[0].delta.content or '' for chunk in completion)
             return completion.choices[0].message.content
         except:
             return "Como posso ajudar você a controlar melhor suas finanças? 💰"
 
     def clear_history(self):
         """Limpa histórico de chat"""
-        self.chat_history = []
+        self.chat_history.clear()
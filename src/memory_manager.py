@@ -5,11 +5,32 @@ import json
 from data_collector import DataCollector
 from analyzer import DataAnalyzer
 
+
+# Templates estáticos das dicas de economia: o texto por categoria é
+# constante, só a meta numérica é formatada por chamada
+_DICAS_ECONOMIA = {
+    'Alimentação': (
+        "🍽️ Suas maiores oportunidades de economia:\n"
+        "• Cozinhe mais em casa (economia de até 40%)\n"
+        "• Compre em atacado produtos não perecíveis\n"
+        "• Use aplicativos de desconto em restaurantes\n"
+    ),
+    'Transporte': (
+        "🚗 Suas maiores oportunidades de economia:\n"
+        "• Considere transporte público ou bike\n"
+        "• Compartilhe caronas quando possível\n"
+        "• Mantenha o veículo sempre revisado\n"
+    ),
+}
+
 class FinanceBotMemory:
     """Sistema de memória inteligente para o FinanceBot"""
     
-    def __init__(self):
-        self.data_collector = DataCollector()
+    def __init__(self, data_collector: DataCollector = None, loader=None):
+        self.data_collector = data_collector or DataCollector()
+        # loader compartilhado opcional (ex.: o cache TTL do FinanceBot):
+        # perfil e análises passam a reusar o mesmo frame carregado
+        self._loader = loader or self.data_collector.load_from_database
         self.user_profile = {}
         self.insights_cache = {}
         self.last_update = None
@@ -18,7 +39,7 @@ class FinanceBotMemory:
     def _load_user_profile(self):
         """Carrega perfil do usuário baseado nos dados históricos"""
         try:
-            df = self.data_collector.load_from_database()
+            df = self._loader()
             if not df.empty:
                 self._analyze_spending_patterns(df)
                 self.last_update = datetime.now()
@@ -32,29 +53,32 @@ class FinanceBotMemory:
         
         analyzer = DataAnalyzer(df)
         stats = analyzer.get_estatisticas_basicas()
+        # Série mensal e soma por categoria calculadas uma vez; média,
+        # tendência e alertas derivam delas em vez de refazer cada groupby
+        monthly_totals = analyzer.gastos_por_mes
+        categoria_gastos = analyzer.gastos_por_categoria
         
         # Padrões básicos
         self.user_profile = {
             'total_gastos': stats.get('total_gastos', 0),
-            'media_mensal': self._get_monthly_average(df),
+            'media_mensal': self._get_monthly_average(monthly_totals),
             'categoria_favorita': stats.get('categoria_mais_gasta', 'N/A'),
             'forma_pagamento_preferida': self._get_preferred_payment(df),
-            'tendencia_gastos': self._get_spending_trend(df),
-            'alertas_ativos': self._generate_spending_alerts(df, stats),
+            'tendencia_gastos': self._get_spending_trend(monthly_totals),
+            'alertas_ativos': self._generate_spending_alerts(categoria_gastos, stats),
             'recomendacoes': self._generate_recommendations(df, stats)
         }
         
         # Padrões avançados
         self.insights_cache = {
-            'gastos_por_categoria': analyzer.gastos_por_categoria().to_dict(),
+            'gastos_por_categoria': categoria_gastos.to_dict(),
             'gastos_recorrentes': self._identify_recurring_expenses(df),
             'metas_sugeridas': self._suggest_budget_goals(stats)
         }
     
-    def _get_monthly_average(self, df: pd.DataFrame) -> float:
+    def _get_monthly_average(self, monthly_totals: pd.Series) -> float:
         """Calcula média mensal de gastos"""
         try:
-            monthly_totals = df.groupby(df['data'].dt.to_period('M'))['valor'].sum()
             return monthly_totals.mean() if not monthly_totals.empty else 0.0
         except:
             return 0.0
@@ -68,10 +92,9 @@ class FinanceBotMemory:
             pass
         return "N/A"
     
-    def _get_spending_trend(self, df: pd.DataFrame) -> str:
+    def _get_spending_trend(self, monthly_totals: pd.Series) -> str:
         """Analisa tendência de gastos (crescente/decrescente)"""
         try:
-            monthly_totals = df.groupby(df['data'].dt.to_period('M'))['valor'].sum()
             if len(monthly_totals) >= 2:
                 recent = monthly_totals.tail(2).values
                 if recent[-1] > recent[-2]:
@@ -82,7 +105,7 @@ class FinanceBotMemory:
         except:
             return "Indefinido"
     
-    def _generate_spending_alerts(self, df: pd.DataFrame, stats: Dict) -> List[str]:
+    def _generate_spending_alerts(self, categoria_gastos: pd.Series, stats: Dict) -> List[str]:
         """Gera alertas baseados nos padrões de gastos"""
         alerts = []
         
@@ -91,7 +114,6 @@ class FinanceBotMemory:
             alerts.append("⚠️ Detectado gasto atípico muito alto")
         
         # Alert de categoria dominante
-        categoria_gastos = df.groupby('categoria')['valor'].sum()
         if not categoria_gastos.empty:
             max_categoria = categoria_gastos.max()
             total = categoria_gastos.sum()
@@ -122,22 +144,14 @@ class FinanceBotMemory:
     def _identify_recurring_expenses(self, df: pd.DataFrame) -> List[Dict]:
         """Identifica gastos recorrentes"""
         try:
-            recurring = []
-            for categoria in df['categoria'].unique():
-                cat_df = df[df['categoria'] == categoria]
-                value_counts = cat_df['valor'].value_counts()
-                frequent_values = value_counts[value_counts >= 2]
-                
-                for valor in frequent_values.index:
-                    occurrences = len(cat_df[cat_df['valor'] == valor])
-                    recurring.append({
-                        'categoria': categoria,
-                        'valor': valor,
-                        'frequencia': occurrences,
-                        'ultima_ocorrencia': cat_df[cat_df['valor'] == valor]['data'].max()
-                    })
-            
-            return sorted(recurring, key=lambda x: x['frequencia'], reverse=True)[:5]
+            # Um groupby (categoria, valor) substitui o par de máscaras por
+            # combinação — uma passada C em vez de O(categorias × valores)
+            g = df.groupby(['categoria', 'valor'], observed=True, sort=False).agg(
+                frequencia=('valor', 'size'),
+                ultima_ocorrencia=('data', 'max')
+            )
+            g = g[g['frequencia'] >= 2].nlargest(5, 'frequencia').reset_index()
+            return g.to_dict('records')
         except:
             return []
     
@@ -204,32 +218,26 @@ class FinanceBotMemory:
         """Conselhos de economia baseados no perfil"""
         categoria_dominante = self.user_profile.get('categoria_favorita', '')
         media_mensal = self.user_profile.get('media_mensal', 0)
-        
-        advice = "💰 DICAS DE ECONOMIA PERSONALIZADAS:\n\n"
-        
-        if categoria_dominante == 'Alimentação':
-            advice += "🍽️ Suas maiores oportunidades de economia:\n"
-            advice += "• Cozinhe mais em casa (economia de até 40%)\n"
-            advice += "• Compre em atacado produtos não perecíveis\n"
-            advice += "• Use aplicativos de desconto em restaurantes\n"
-        elif categoria_dominante == 'Transporte':
-            advice += "🚗 Suas maiores oportunidades de economia:\n"
-            advice += "• Considere transporte público ou bike\n"
-            advice += "• Compartilhe caronas quando possível\n"
-            advice += "• Mantenha o veículo sempre revisado\n"
-        
+
+        partes = ["💰 DICAS DE ECONOMIA PERSONALIZADAS:\n\n"]
+
+        dica = _DICAS_ECONOMIA.get(categoria_dominante)
+        if dica:
+            partes.append(dica)
+
         if media_mensal > 1000:
-            advice += f"\n🎯 Meta sugerida: economizar R$ {media_mensal * 0.15:.2f}/mês (15%)"
-        
-        return advice
+            partes.append(f"\n🎯 Meta sugerida: economizar R$ {media_mensal * 0.15:.2f}/mês (15%)")
+
+        return ''.join(partes)
     
     def _get_budget_advice(self) -> str:
         """Conselhos de orçamento personalizados"""
-        advice = "📋 ORÇAMENTO PERSONALIZADO:\n\n"
-        advice += "Baseado no seu perfil, sugiro:\n"
-        
+        # append + join: += em loop copia a string inteira a cada categoria
+        partes = ["📋 ORÇAMENTO PERSONALIZADO:\n\n", "Baseado no seu perfil, sugiro:\n"]
+        total = self.user_profile.get('total_gastos', 1)
+
         for categoria, valor in self.insights_cache.get('gastos_por_categoria', {}).items():
-            percentual = (valor / self.user_profile.get('total_gastos', 1)) * 100
-            advice += f"• {categoria}: R$ {valor:,.2f} ({percentual:.1f}%)\n"
+            percentual = (valor / total) * 100
+            partes.append(f"• {categoria}: R$ {valor:,.2f} ({percentual:.1f}%)\n")
         
-        return advice
+        return ''.join(partes)